@@ -4,7 +4,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 import random
 
-from models import setup_db, Question, Category
+from models import setup_db, database_path, Question, Category
 
 QUESTIONS_PER_PAGE = 10
 
@@ -23,10 +23,26 @@ def paginate(request, selection):
     return current_questions
 
 
+def paginate_query(request, query):
+    # Fetches only the 10 questions of the requested page from the database.
+    page = request.args.get('page', 1, type=int)
+
+    # Pages before the first one have no questions.
+    if page < 1:
+        return []
+
+    start = (page - 1) * QUESTIONS_PER_PAGE
+    questions = query.order_by(Question.id).offset(
+        start).limit(QUESTIONS_PER_PAGE).all()
+
+    return [question.format() for question in questions]
+
+
 def create_app(test_config=None):
     # Creates and configures the app
     app = Flask(__name__)
-    setup_db(app)
+    # Lets tests point the app at another database, e.g. SQLite.
+    setup_db(app, (test_config or {}).get('DATABASE_PATH', database_path))
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     @app.after_request
@@ -91,12 +107,10 @@ def create_app(test_config=None):
             abort(400)
 
         # Retrieves the questions paginated.
-        questions = Question.query.all()
-        current_questions = paginate(request, questions)
+        current_questions = paginate_query(request, Question.query)
 
         # Aborts if no questions are found.
-        total_num_of_questions = len(current_questions)
-        if (total_num_of_questions == 0):
+        if (len(current_questions) == 0):
             abort(404)
 
         # Retrieves the categories formatted.
@@ -112,7 +126,7 @@ def create_app(test_config=None):
         return jsonify({
           'success': True,
           'questions': current_questions,
-          'total_questions': len(Question.query.all()),
+          'total_questions': Question.query.count(),
           'categories': formatted_categories
         })
 
@@ -134,7 +148,7 @@ def create_app(test_config=None):
                 return jsonify({
                     'success': True,
                     'deleted_question': question.format(),
-                    'total_num_of_questions': len(Question.query.all())
+                    'total_num_of_questions': Question.query.count()
                 })
         # Aborts if an exception is caught.
         except Exception:
@@ -174,7 +188,7 @@ def create_app(test_config=None):
             # Returns data.
             return jsonify({
                 'success': True,
-                'total_num_of_questions': len(Question.query.all()),
+                'total_num_of_questions': Question.query.count(),
                 'created_question': question.format()
             })
 
@@ -220,7 +234,7 @@ def create_app(test_config=None):
 
         if category_id == 0:
             # Retrieves all questions.
-            questions = Question.query.all()
+            questions = Question.query
         else:
             # Retrieve category information.
             category = Category.query.filter_by(id=int(category_id)).one_or_none()
@@ -231,16 +245,16 @@ def create_app(test_config=None):
 
             # Retrieves all questions by a specific category.
             questions = Question.query.filter_by(
-                category=str(category.id)).all()
+                category=str(category.id))
 
         # Retrieves the questions paginated.
-        current_questions = paginate(request, questions)
+        current_questions = paginate_query(request, questions)
 
         # Returns data.
         return jsonify({
           'success': True,
           'questions': current_questions,
-          'total_questions': len(questions),
+          'total_questions': questions.count(),
           'current_category': category_id
         })
 
@@ -258,14 +272,14 @@ def create_app(test_config=None):
             abort(400)
 
         # Retrieves all questions that are not in previous_questions.
-        questions = Question.query.filter(
-            Question.id.notin_(previous_questions)).all()
+        query = Question.query.filter(
+            Question.id.notin_(previous_questions))
 
         # Retrieves all questions by a specific category.
         if(category != 0):
-            questions = Question.query.filter(
-                Question.category == str(category)).filter(
-                    Question.id.notin_(previous_questions)).all()
+            query = query.filter(Question.category == str(category))
+
+        questions = query.all()
 
         # Aborts if no questions were found.
         if(len(questions) == 0):
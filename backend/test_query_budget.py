@@ -0,0 +1,312 @@
+import os
+import re
+import json
+import tempfile
+import unittest
+from contextlib import contextmanager
+from sqlalchemy import event
+
+from flaskr import create_app
+from models import db, Question, Category
+
+CATEGORIES = ['Science', 'Art', 'Geography', 'History', 'Entertainment',
+              'Sports']
+QUESTIONS_PER_CATEGORY = 5
+CLAUSES_AFTER_FROM = ('WHERE', 'GROUP', 'HAVING', 'ORDER', 'LIMIT', 'OFFSET',
+                      'UNION', 'RETURNING')
+
+
+def tables_selected_from(statement):
+    # Returns the tables named in the outermost FROM list and JOINs, so the
+    # single row of e.g. "SELECT count(*) FROM (SELECT ... FROM questions)"
+    # is not counted as a question row.
+    tables = []
+    depth = 0
+    in_from = False
+    tokens = re.findall(r'\(|\)|,|[\w."]+', statement)
+    for index, token in enumerate(tokens[:-1]):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth > 0:
+            continue
+        elif token.upper() in ('FROM', 'JOIN') or (token == ',' and in_from):
+            # A comma only separates tables while inside the FROM list.
+            in_from = True
+            if tokens[index + 1] not in ('(', ','):
+                tables.append(tokens[index + 1].strip('"'))
+        elif token.upper() in CLAUSES_AFTER_FROM:
+            in_from = False
+    return tables
+
+
+class QueryCounter(object):
+    # Records every statement executed on an engine and the rows fetched
+    # from its result while it is active.
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.queries = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'after_execute', self.after_execute)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'after_execute', self.after_execute)
+
+    def after_execute(self, conn, clauseelement, multiparams, params, result):
+        query = {
+            'statement': result.context.statement,
+            'parameters': result.context.parameters,
+            'tables': tables_selected_from(result.context.statement),
+            'rows': 0
+        }
+        self.queries.append(query)
+
+        # Wraps the result's fetch methods, which the ORM goes through to
+        # load rows, so the rows are counted once they are fetched.
+        for name in ('_fetchone_impl', '_fetchmany_impl', '_fetchall_impl'):
+            setattr(result, name, self.count_rows(query,
+                                                  getattr(result, name)))
+
+    def count_rows(self, query, fetch):
+        def counted_fetch(*args, **kwargs):
+            rows = fetch(*args, **kwargs)
+            if isinstance(rows, list):
+                query['rows'] += len(rows)
+            elif rows is not None:
+                query['rows'] += 1
+            return rows
+        return counted_fetch
+
+    def rows(self, table=None):
+        # Returns the number of rows fetched, optionally only from a table.
+        return sum(query['rows'] for query in self.queries
+                   if table is None or table in query['tables'])
+
+    def format(self):
+        return '\n'.join('{}. [{} rows] {} {}'.format(
+            number, query['rows'], ' '.join(query['statement'].split()),
+            query['parameters'])
+            for number, query in enumerate(self.queries, 1))
+
+
+class QueryBudgetTestCase(unittest.TestCase):
+    # This class checks how many queries and rows each endpoint costs,
+    # using a seeded SQLite database so no Postgres server is needed.
+
+    def setUp(self):
+        # Define test variables and initialize app.
+        self.database_file, self.database_file_path = tempfile.mkstemp(
+            suffix='.db')
+        self.app = create_app({
+            'DATABASE_PATH': 'sqlite:///' + self.database_file_path
+        })
+        self.client = self.app.test_client
+
+        # Seeds the categories and questions.
+        with self.app.app_context():
+            for category_id, category_type in enumerate(CATEGORIES, 1):
+                db.session.add(Category(type=category_type))
+                for number in range(QUESTIONS_PER_CATEGORY):
+                    db.session.add(Question(
+                        question='{} question {}'.format(category_type,
+                                                         number),
+                        answer='answer',
+                        category=str(category_id),
+                        difficulty=number % 5 + 1))
+            db.session.commit()
+            db.session.remove()
+            self.engine = db.engine
+
+    def tearDown(self):
+        """Executed after reach test"""
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.close(self.database_file)
+        os.remove(self.database_file_path)
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=None, max_rows=None,
+                          max_table_rows=None):
+        # Fails with the captured SQL if the code run inside the block
+        # executes more queries or fetches more rows than allowed.
+        with QueryCounter(self.engine) as counter:
+            yield counter
+
+        errors = []
+        if max_queries is not None and len(counter.queries) > max_queries:
+            errors.append('ran {} queries, budget is {}'.format(
+                len(counter.queries), max_queries))
+        if max_rows is not None and counter.rows() > max_rows:
+            errors.append('fetched {} rows, budget is {}'.format(
+                counter.rows(), max_rows))
+        for table, max_table_row in (max_table_rows or {}).items():
+            if counter.rows(table) > max_table_row:
+                errors.append('fetched {} {} rows, budget is {}'.format(
+                    counter.rows(table), table, max_table_row))
+
+        if errors:
+            self.fail('Query budget exceeded: {}\n{}'.format(
+                '; '.join(errors), counter.format()))
+
+    def test_query_counter_counts_queries_and_rows(self):
+        with QueryCounter(self.engine) as counter:
+            response = self.client().get('/categories/2/questions')
+
+        # The category, the page of questions and their count.
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(counter.queries), 3)
+        self.assertEqual(counter.rows('categories'), 1)
+        self.assertEqual(counter.rows('questions'), QUESTIONS_PER_CATEGORY)
+        self.assertEqual(counter.rows(), QUESTIONS_PER_CATEGORY + 2)
+
+    def test_query_budget_exceeded(self):
+        with self.assertRaises(AssertionError) as context:
+            with self.assertQueryBudget(max_queries=0,
+                                        max_table_rows={'categories': 0}):
+                self.client().get('/categories')
+
+        message = str(context.exception)
+        self.assertIn('ran 1 queries, budget is 0', message)
+        self.assertIn('fetched 6 categories rows, budget is 0', message)
+        self.assertIn('FROM categories', message)
+
+    def test_subquery_rows_not_counted_for_its_tables(self):
+        self.assertEqual(tables_selected_from(
+            'SELECT count(*) AS count_1 FROM (SELECT questions.id '
+            'FROM questions) AS anon_1'), [])
+        self.assertEqual(tables_selected_from(
+            'SELECT questions.id FROM questions JOIN categories '
+            'ON questions.category = categories.id'),
+            ['questions', 'categories'])
+
+    def test_comma_separated_tables_are_counted(self):
+        self.assertEqual(tables_selected_from(
+            'SELECT questions.id FROM questions, categories '
+            'WHERE questions.category = categories.id'),
+            ['questions', 'categories'])
+        self.assertEqual(tables_selected_from(
+            'SELECT q.id FROM questions AS q, categories AS c, '
+            '(SELECT 1) AS anon_1 ORDER BY q.id, c.id'),
+            ['questions', 'categories'])
+
+    def test_get_categories_budget(self):
+        with self.assertQueryBudget(max_queries=1,
+                                    max_table_rows={'categories': 6}):
+            response = self.client().get('/categories')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_questions_budget(self):
+        # One query for the page, one to count and one for the categories.
+        with self.assertQueryBudget(max_queries=3,
+                                    max_table_rows={'questions': 10,
+                                                    'categories': 6}):
+            response = self.client().get('/questions?page=2')
+        data = json.loads(response.data.decode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['questions']), 10)
+        self.assertEqual(data['total_questions'],
+                         len(CATEGORIES) * QUESTIONS_PER_CATEGORY)
+
+    def test_search_budget(self):
+        with self.assertQueryBudget(max_queries=1,
+                                    max_table_rows={'questions': 5}):
+            response = self.client().post('/questions/search',
+                                          data=json.dumps(dict(
+                                            searchTerm='Art')),
+                                          content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_category_questions_budget(self):
+        # One query for the category, one for the page and one to count.
+        with self.assertQueryBudget(max_queries=3,
+                                    max_table_rows={'questions': 5,
+                                                    'categories': 1}):
+            response = self.client().get('/categories/3/questions')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_all_category_questions_budget(self):
+        # One query for the page and one to count.
+        with self.assertQueryBudget(max_queries=2,
+                                    max_table_rows={'questions': 10}):
+            response = self.client().get('/categories/0/questions?page=2')
+        data = json.loads(response.data.decode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['questions']), 10)
+        self.assertEqual(data['total_questions'],
+                         len(CATEGORIES) * QUESTIONS_PER_CATEGORY)
+
+    def test_add_question_budget(self):
+        with self.assertQueryBudget(max_queries=3,
+                                    max_table_rows={'questions': 1}):
+            response = self.client().post('/questions',
+                                          data=json.dumps(dict(
+                                            question='test',
+                                            answer='test',
+                                            difficulty=4,
+                                            category='2')),
+                                          content_type='application/json')
+        data = json.loads(response.data.decode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['total_num_of_questions'],
+                         len(CATEGORIES) * QUESTIONS_PER_CATEGORY + 1)
+
+    def test_delete_question_budget(self):
+        with self.assertQueryBudget(max_queries=3,
+                                    max_table_rows={'questions': 1}):
+            response = self.client().delete('/questions/3')
+        data = json.loads(response.data.decode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['total_num_of_questions'],
+                         len(CATEGORIES) * QUESTIONS_PER_CATEGORY - 1)
+
+    def test_update_question_budget(self):
+        with self.assertQueryBudget(max_queries=3,
+                                    max_table_rows={'questions': 2}):
+            response = self.client().patch('/questions/3',
+                                           data=json.dumps(dict(
+                                             category='2')),
+                                           content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_play_trivia_budget(self):
+        with self.assertQueryBudget(max_queries=1,
+                                    max_table_rows={'questions': 4}):
+            response = self.client().post('/quizzes',
+                                          data=json.dumps(dict(
+                                                      previousQuestions=[6],
+                                                      quizCategory={"id": 2})),
+                                          content_type='application/json')
+        data = json.loads(response.data.decode())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(int(data['question']['category']), 2)
+
+    def test_play_trivia_all_categories_budget(self):
+        with self.assertQueryBudget(max_queries=1,
+                                    max_table_rows={'questions': 29}):
+            response = self.client().post('/quizzes',
+                                          data=json.dumps(dict(
+                                                      previousQuestions=[1],
+                                                      quizCategory={"id": 0})),
+                                          content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()